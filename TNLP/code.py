@@ -1,13 +1,12 @@
+import os
 import sys
-from llama_cpp import Llama
 
 # -------------------------------
 # Model Configuration
 # -------------------------------
-MODEL_PATH = "mistral-7b-instruct-v0.2.Q4_K_M.gguf"  # Replace with your actual model path
-N_CTX = 2048
-N_THREADS = 6
-VERBOSE = True
+# Model path, context size and threads come from the task profiles in backend/config.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from profiles import get_llm_for_task
 
 # -------------------------------
 # Prompt Template
@@ -98,13 +97,8 @@ Output:
 """.strip()
 
 def main():
-    # Instantiate the Llama model (this may take a few seconds to load)
-    llm = Llama(
-        model_path=MODEL_PATH,
-        n_ctx=N_CTX,
-        n_threads=N_THREADS,
-        verbose=VERBOSE
-    )
+    # Load the Llama model for the filter extraction profile (this may take a few seconds)
+    llm = get_llm_for_task("eon_filters")
 
     print("Type your queries (or 'exit' to quit).")
 
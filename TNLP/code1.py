@@ -1,9 +1,10 @@
+import os
+import sys
 import json
-from llama_cpp import Llama
 
-MODEL_PATH = "mistral-7b-instruct-v0.2.Q4_K_M.gguf"  # Update as needed
-N_CTX = 2048
-N_THREADS = 6
+# Model path, context size and threads come from the task profiles in backend/config.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from profiles import get_llm_for_task
 
 # Short prompt telling the model to not guess if date is missing.
 BASE_PROMPT = """Extract these fields from the input in JSON, no extra text:
@@ -28,16 +29,15 @@ Input: """
 
 def call_llm(prompt):
     """Calls the local Mistral model with llama-cpp-python and returns text."""
-    llama = Llama(
-        model_path=MODEL_PATH,
-        n_ctx=N_CTX,
-        n_threads=N_THREADS,
+    llama = get_llm_for_task("eon_filters")
+    output = llama(
+        prompt=prompt,
         temperature=0.2,
         top_p=0.9,
         max_tokens=256,
+        stop=["Input:", "Output:"],
         echo=False
     )
-    output = llama(prompt=prompt, stop=["Input:", "Output:"], echo=False)
     return output["choices"][0]["text"].strip()
 
 def main():
@@ -72,7 +72,8 @@ def main():
             # e.g. "hello i want orders which are cancelled" + " from january" → "hello i want orders which are cancelled from january"
             combined_query = user_query + " from " + date_input
 
-            # Build new prompt
+            # Build new prompt. It shares BASE_PROMPT + the original query with the first one,
+            # and the model instance is reused, so llama-cpp only evaluates the appended date.
             second_prompt = BASE_PROMPT + f"\"{combined_query}\"\nOutput:"
             second_response = call_llm(second_prompt)
 
@@ -1,20 +1,56 @@
+import threading
+
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from core import load_mistral_llm, process_question
-from config import DB_URI
+
+from core import load_mistral_llm, process_question, warm_sql_prefixes
+from config import DB_URI, N_WORKERS, LLM_BACKEND
+from workers import start_worker_pool
+from value_index import ValueIndex
+from embedder import embedder_stats
+from sessions import SessionStore
+from state_store import collect_garbage
+from stub_llm import StubLLM
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # ✅ Enable CORS for frontend integration (Angular, Postman, etc.)
 
-# Load Mistral model once at startup
-llm = load_mistral_llm()
+# Restarted model workers are spawned, which re-imports this file as __mp_main__:
+# only the serving process loads models and starts background threads.
+if __name__ != "__mp_main__":
+    # Drop cached prompt states of old model files before loading
+    collect_garbage()
+
+    # Load Mistral model once at startup (or one model process per core set)
+    if LLM_BACKEND == "stub":
+        llm = StubLLM()
+    else:
+        llm = start_worker_pool() if N_WORKERS > 1 else load_mistral_llm()
+
+    # Build the column-value index in the background; queries run ungrounded until it is ready
+    value_index = ValueIndex(DB_URI).start()
+
+    # Evaluate (or restore from disk) the common SQL prompt prefixes off the request path
+    threading.Thread(target=warm_sql_prefixes, args=(DB_URI, llm), name="prompt-warmup", daemon=True).start()
+
+    # Conversation sessions for follow-up questions
+    sessions = SessionStore()
 
 # Health check endpoint
 @app.route("/api/health", methods=["GET"])
 def health_check():
     return jsonify({"status": "ok"})
 
+# Runtime metrics (embedder latency/batching, worker load)
+@app.route("/api/metrics", methods=["GET"])
+def metrics():
+    return jsonify({
+        "embedder": embedder_stats(),
+        "workers": llm.stats() if hasattr(llm, "stats") else None,
+        "sessions": sessions.stats(),
+    })
+
 # Main chatbot endpoint
 @app.route("/api/query", methods=["POST"])
 def handle_query():
@@ -28,8 +64,23 @@ def handle_query():
         if not question:
             return jsonify({"error": "Empty question"}), 400
 
-        # Process question using Mistral + DB
-        result = process_question(question, DB_URI, llm)
+        # Optional: "session_id" from a previous answer makes this a follow-up question
+        session_id = data.get("session_id")
+        if session_id is None:
+            # Process question using Mistral + DB
+            result = process_question(question, DB_URI, llm, value_index)
+        else:
+            if not hasattr(llm, "generate_with_state"):
+                # Model state lives in the worker processes, which have no session protocol
+                return jsonify({"error": "Sessions are not available with N_WORKERS > 1"}), 400
+            if not isinstance(session_id, str):
+                return jsonify({"error": "'session_id' must be a string"}), 400
+            session = sessions.create() if session_id == "" else sessions.get(session_id)  # "" starts a new session
+            if session is None:
+                return jsonify({"error": "Unknown or expired session_id; send \"\" to start a new session"}), 404
+            with session.lock:
+                result = process_question(question, DB_URI, llm, value_index, session)
+            sessions.touch(session)
 
         return jsonify(result)
 
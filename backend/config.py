@@ -1,3 +1,5 @@
+import os
+
 # Database settings
 DB_USER = "root"
 DB_PASSWORD = "admin"
@@ -5,10 +7,70 @@ DB_HOST = "localhost"
 DB_PORT = 3306
 DB_NAME = "chatbot"
 
-DB_URI = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+DB_URI = os.environ.get("NLP_DB_URI", f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
 
 # Model config
-MODEL_PATH = "models/mistral-7b-instruct-v0.2.Q4_K_M.gguf"  # Path to your local GGUF file
+# Relative model paths resolve against this directory, so eon/ and TNLP/ scripts find the same files
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BACKEND_DIR, "models/mistral-7b-instruct-v0.2.Q4_K_M.gguf")  # Path to your local GGUF file
 N_CTX = 2048
 N_THREADS = 6
 VERBOSE = True
+LLM_BACKEND = os.environ.get("NLP_LLM_BACKEND", "llama")  # "stub" = canned SQL, no model (load tests)
+STUB_LLM_LATENCY = float(os.environ.get("NLP_STUB_LLM_LATENCY", "0.2"))  # Seconds per stub generation
+
+# Named model profiles (see profiles.py): quantization + context size, passed straight to Llama().
+# If a profile's model file is missing, it runs on MODEL_PATH with its own context size instead.
+MODEL_PROFILES = {
+    "q4_k_m_2048": {
+        "model_path": MODEL_PATH,
+        "n_ctx": N_CTX,
+        "n_threads": N_THREADS,
+    },
+    "q3_k_m_1024": {
+        "model_path": os.path.join(BACKEND_DIR, "models/mistral-7b-instruct-v0.2.Q3_K_M.gguf"),
+        "n_ctx": 1024,
+        "n_threads": N_THREADS,
+    },
+}
+
+# Which profile each task runs on
+TASK_PROFILES = {
+    "sql": "q4_k_m_2048",  # Text-to-SQL over a schema-laden prompt: keep accuracy and context
+    "eon_filters": "q3_k_m_1024",  # Short JSON filter extraction: smaller quant, short context
+}
+
+# Worker pool config (see workers.py)
+N_WORKERS = 1  # 1 = load the model in the API process, >1 = one model process per core set
+WORKER_THREADS = None  # Threads per worker; None = one per core in the worker's core set
+
+# Schema retrieval index (see schema_index.py)
+EMBEDDING_MODEL_NAME = "BAAI/bge-small-en"
+EMBEDDING_BACKEND = "torch"  # "torch" or "onnx" (CPU; see EMBEDDING_ONNX_FILE)
+EMBEDDING_ONNX_FILE = "onnx/model_qint8_avx512_vnni.onnx"  # int8 export; None = fp32 ONNX
+EMBEDDING_CACHE_SIZE = 10000  # LRU entries of text -> embedding
+EMBEDDING_MAX_BATCH = 64
+EMBEDDING_BATCH_WINDOW = 0.005  # Seconds to wait for concurrent encode calls to join a batch
+CHROMA_DB_PATH = "./chroma_db"
+CHROMA_COLLECTION_NAME = "schema_chunks"
+SCHEMA_INDEX_INTERVAL = 15 * 60  # Seconds between scheduled re-syncs
+SCHEMA_RETRIEVAL_TOP_K = 3  # Tables retrieved for a question when none are named in it
+
+# Column-value index for entity grounding (see value_index.py)
+VALUE_INDEX_MAX_DISTINCT = 200  # Only index text columns with at most this many distinct values
+VALUE_INDEX_MAX_VALUES = 50000  # Hard cap on indexed values across all columns
+VALUE_INDEX_REFRESH = 60 * 60  # Seconds between rebuilds
+
+# Conversational sessions (see sessions.py)
+SESSION_IDLE_TTL = 15 * 60  # Seconds a session may sit idle before it is dropped
+SESSION_MAX_BYTES = 2 * 1024 ** 3  # Cap on saved model states across all sessions
+SESSION_MAX_COUNT = 1000  # Cap on live sessions, including ones without a saved state yet
+
+# On-disk store of evaluated prompt prefixes (see state_store.py)
+PROMPT_STATE_DIR = "./prompt_states"
+PROMPT_STATE_MAX_BYTES = 4 * 1024 ** 3
+PROMPT_STATE_MAX_AGE = 7 * 24 * 60 * 60  # Seconds since last use before an entry is dropped
+# Table sets whose SQL prompt prefix is evaluated (or restored) in the background at startup.
+# List the sets your common questions select. Without a schema index the pick_tables() fallback
+# (first 3 tables) is warmed as well; with one, tables are retrieved per question.
+PROMPT_WARM_TABLE_SETS = []
@@ -3,6 +3,7 @@ import sys
 from typing import Optional
 import logging
 import re
+import threading
 
 # Disable LangChain debug logs
 logging.getLogger("langchain").setLevel(logging.ERROR)
@@ -22,7 +23,14 @@ from llama_cpp import Llama
 
 # Define a wrapper so our LLM interface remains the same:
 class MistralLLM:
-    def __init__(self, model_path: str, n_ctx: int, n_threads: int, verbose: bool):
+    def __init__(self, model_path: str = None, n_ctx: int = None, n_threads: int = None,
+                 verbose: bool = True, llama: Llama = None):
+        # llama-cpp contexts are not thread-safe; one generation at a time
+        self.lock = threading.Lock()
+        if llama is not None:
+            # Already loaded, e.g. shared through the profile registry
+            self.llama = llama
+            return
         print("⏳ Loading Mistral-7B-Instruct model (llama-cpp)...")
         self.llama = Llama(
             model_path=model_path,
@@ -32,8 +40,7 @@ class MistralLLM:
         )
         print("✅ Model loaded!")
     
-    def __call__(self, prompt: str) -> str:
-        # Call the model and return the generated text.
+    def _complete(self, prompt: str) -> str:
         output = self.llama(
             prompt,
             max_tokens=512,
@@ -41,21 +48,56 @@ class MistralLLM:
         # Expecting output in the form: {"choices": [{"text": "..."}], ...}
         return output["choices"][0]["text"].strip()
 
-# Set your model path and parameters here:
-MODEL_PATH = "mistral-7b-instruct-v0.2.Q4_K_M.gguf"  # Replace with your actual model path
-N_CTX = 2048
-N_THREADS = 6
-VERBOSE = True
+    def __call__(self, prompt: str) -> str:
+        # Call the model and return the generated text.
+        with self.lock:
+            return self._complete(prompt)
+
+    def generate_with_state(self, prompt: str, state=None):
+        """
+        Restore a previously saved model state, then generate. llama-cpp only evaluates the
+        tokens of `prompt` past the longest prefix already in the restored context, so a
+        follow-up that extends the previous prompt costs just the new tokens.
+        Returns (text, state after generation).
+        """
+        with self.lock:
+            if state is not None:
+                self.llama.load_state(state)
+            text = self._complete(prompt)
+            return text, self.llama.save_state()
+
+    def warm_prefix(self, prefix: str, save: bool = True):
+        """Load the evaluated prefix from the on-disk state store (or, if save, evaluate and save it)."""
+        with self.lock:
+            state_store.warm_prefix(self.llama, prefix, state_store.get_state_store(), save)
+
+    def fits(self, prompt: str, max_tokens: int = 512) -> bool:
+        """Whether prompt + a full answer fit in the context window."""
+        n_prompt = len(self.llama.tokenize(prompt.encode("utf-8")))
+        return n_prompt + max_tokens <= self.llama.n_ctx()
+
+# Model path, context size and threads come from the "sql" task profile in config.py
+from profiles import get_llm_for_task
+from config import PROMPT_WARM_TABLE_SETS
+import state_store
+from schema_index import retrieve_tables, index_ready
 # ----- End New Model Loading Section -----
 
 def load_mistral_llm():
-    return MistralLLM(model_path=MODEL_PATH, n_ctx=N_CTX, n_threads=N_THREADS, verbose=VERBOSE)
+    return MistralLLM(llama=get_llm_for_task("sql"))
 
-def pick_tables(question: str, all_tables: list) -> list:
-    """Naive approach: pick tables whose names appear in the user's question.
-       Fallback: pick the first 3 tables."""
+def pick_tables(question: str, all_tables: list, hinted_tables: list = ()) -> list:
+    """Naive approach: pick tables whose names appear in the user's question,
+       plus tables owning values found in it (hinted_tables).
+       Fallback: the closest tables from the schema embedding index, else the first 3 tables."""
     question_lower = question.lower()
     relevant = [t for t in all_tables if t.lower() in question_lower]
+    relevant += [t for t in hinted_tables if t in all_tables and t not in relevant]
+    if not relevant:
+        try:
+            relevant = [t for t in retrieve_tables(question) if t in all_tables]
+        except Exception as e:
+            print(f"⚠️ Schema retrieval failed: {e}")
     return relevant or all_tables[:3]
 
 def get_schema_text(db: SQLDatabase, db_uri: str) -> str:
@@ -115,47 +157,143 @@ def extract_sql_query(text: str) -> str:
         return match.group(0).strip()
     else:
         return text.strip()
-def generate_sql_custom(question: str, schema_text: str, llm) -> str:
-    """
-    Manually constructs a prompt (similar to your base version) and uses the LLM
-    to generate a SQL query.
-    """
-    prompt = (
+def format_value_hints(value_matches: list) -> str:
+    """Render value index matches as exact literals the model can copy into WHERE clauses."""
+    lines = []
+    for m in value_matches:
+        literal = m["value"].replace("'", "''")  # SQL-escape quotes, e.g. O'Brien -> 'O''Brien'
+        lines.append(f"- {m['table']}.{m['column']} = '{literal}'")
+    return "\n".join(lines)
+
+def _values_text(value_matches: list) -> str:
+    if not value_matches:
+        return ""
+    return (
+        "Known values mentioned in the question (use these exact literals):\n"
+        f"{format_value_hints(value_matches)}\n\n"
+    )
+
+def sql_prompt_prefix(schema_text: str) -> str:
+    """Question-independent start of the SQL prompt; its evaluated state is cached on disk."""
+    return (
         "Generate an SQL query strictly based on the schema provided.\n\n"
         f"Schema:\n{schema_text}\n\n"
+    )
+
+def build_sql_prompt(question: str, schema_text: str, value_matches: list = ()) -> str:
+    return (
+        f"{sql_prompt_prefix(schema_text)}"
+        f"{_values_text(value_matches)}"
         f"Question:\n{question}\n\n"
         "Only output SQL code. Do not output any explanation or additional text.\n"
         "SQL:"
     )
-    result = llm(prompt)
+
+def build_followup_prompt(session, question: str, value_matches: list = ()) -> str:
+    """
+    Extend the previous turn (prompt + answer) with the follow-up question, so the model
+    state saved after that turn is a prefix of the new prompt.
+    """
+    return (
+        f"{session.prompt} {session.answer}\n\n"
+        "Follow-up question (rewrite the previous SQL query accordingly):\n"
+        f"{question}\n\n"
+        f"{_values_text(value_matches)}"
+        "Only output SQL code. Do not output any explanation or additional text.\n"
+        "SQL:"
+    )
+
+def generate_sql_custom(question: str, schema_text: str, llm, value_matches: list = ()) -> str:
+    """
+    Manually constructs a prompt (similar to your base version) and uses the LLM
+    to generate a SQL query.
+    """
+    result = llm(build_sql_prompt(question, schema_text, value_matches))
     return result.strip()
 
 from langchain_community.utilities import SQLDatabase
 from sqlalchemy import create_engine, text
 
-def process_question(question: str, db_uri: str, llm) -> dict:
+def warm_sql_prefixes(db_uri: str, llm, table_sets: list = PROMPT_WARM_TABLE_SETS):
+    """
+    Evaluate (or restore from disk) the SQL prompt prefix of each configured table set.
+    Without a schema index, pick_tables() falls back to the first 3 tables, so that set is warmed
+    too; with one, the fallback is per-question retrieval and only the configured sets are warmed.
+    Meant to run in a background thread at startup.
+    """
+    if not hasattr(llm, "warm_prefix"):
+        return
+    sets = list(table_sets)
+    try:
+        use_fallback = not index_ready()
+    except Exception as e:
+        print(f"⚠️ Schema index unavailable: {e}")
+        use_fallback = True
+    if use_fallback:
+        sets.insert(0, SQLDatabase.from_uri(db_uri).get_usable_table_names()[:3])
+    for tables in sets:
+        try:
+            filtered_db = SQLDatabase.from_uri(db_uri, include_tables=tables)
+            llm.warm_prefix(sql_prompt_prefix(get_schema_text(filtered_db, db_uri)))
+            print(f"✅ Warmed SQL prompt prefix for {tables}")
+        except Exception as e:
+            print(f"⚠️ Could not warm SQL prompt prefix for {tables}: {e}")
+
+def process_question(question: str, db_uri: str, llm, value_index=None, session=None) -> dict:
     """
     Process a user question and return generated SQL and DB results.
     This is the web-friendly version of the original main() loop.
+    With a session, a question after the first one is treated as a follow-up: it reuses the
+    previous schema and model state, so only the new tokens are evaluated. Sessions need an llm
+    with generate_with_state() and fits() (MistralLLM, StubLLM; not the WorkerPool).
     """
+    value_matches = value_index.match(question) if value_index else []
 
-    # 1) Build a wide DB for table discovery
-    wide_db = SQLDatabase.from_uri(db_uri)
-    all_table_names = wide_db.get_usable_table_names()
+    # 0) Follow-up: extend the previous turn if it still fits in the context window
+    prompt = None
+    follow_up = session is not None and session.has_history()
+    if follow_up:
+        prompt = build_followup_prompt(session, question, value_matches)
+        if not llm.fits(prompt):
+            prompt, follow_up = None, False
 
-    # 2) Choose relevant tables using partial schema selection
-    relevant_tables = pick_tables(question, all_table_names)
+    if prompt is None:
+        # 1) Build a wide DB for table discovery
+        wide_db = SQLDatabase.from_uri(db_uri)
+        all_table_names = wide_db.get_usable_table_names()
 
-    # 3) Reflect columns only for relevant tables
-    filtered_db = SQLDatabase.from_uri(db_uri, include_tables=relevant_tables)
+        # 2) Ground entities against the value index, then choose relevant tables
+        relevant_tables = pick_tables(question, all_table_names, [m["table"] for m in value_matches])
 
-    # 4) Build a schema text from the filtered DB (including FK info)
-    schema_text = get_schema_text(filtered_db, db_uri)
+        # 3) Reflect columns only for relevant tables
+        filtered_db = SQLDatabase.from_uri(db_uri, include_tables=relevant_tables)
+
+        # 4) Build a schema text from the filtered DB (including FK info)
+        schema_text = get_schema_text(filtered_db, db_uri)
+        prompt = build_sql_prompt(question, schema_text, value_matches)
+        if hasattr(llm, "warm_prefix") and session is None:
+            # Restore only: snapshots are written by warm_sql_prefixes(), never on the request path
+            llm.warm_prefix(sql_prompt_prefix(schema_text), save=False)
+    else:
+        relevant_tables, schema_text = session.tables, session.schema_text
 
     # 5) Generate SQL using the custom prompt (manual logic)
-    sql_query_raw = generate_sql_custom(question, schema_text, llm)
+    state = None
+    if session is not None:
+        try:
+            sql_query_raw, state = llm.generate_with_state(prompt, session.state if follow_up else None)
+        except Exception:
+            # Don't keep extending a turn that failed; the next question starts fresh
+            session.prompt = session.answer = session.state = None
+            raise
+    else:
+        sql_query_raw = llm(prompt)
     final_sql = extract_sql_query(sql_query_raw)
 
+    if session is not None:
+        session.prompt, session.answer, session.state = prompt, sql_query_raw, state
+        session.tables, session.schema_text, session.sql = relevant_tables, schema_text, final_sql
+
     # 6) Execute the SQL query using SQLAlchemy
     engine = create_engine(db_uri)
     with engine.connect() as connection:
@@ -163,7 +301,10 @@ def process_question(question: str, db_uri: str, llm) -> dict:
         rows = [dict(row._mapping) for row in result.fetchall()]  # Convert to list of dicts
 
     # 7) Return SQL + results
-    return {
+    response = {
         "sql": final_sql,
         "results": rows
     }
+    if session is not None:
+        response["session_id"] = session.id
+    return response
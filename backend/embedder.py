@@ -0,0 +1,161 @@
+import time
+import queue
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from config import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BACKEND,
+    EMBEDDING_ONNX_FILE,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_MAX_BATCH,
+    EMBEDDING_BATCH_WINDOW,
+)
+
+LATENCY_SAMPLES = 1000  # Recent encode batches kept for latency percentiles
+
+
+def load_sentence_transformer(model_name: str = EMBEDDING_MODEL_NAME, backend: str = EMBEDDING_BACKEND):
+    if backend == "onnx":
+        model_kwargs = {"file_name": EMBEDDING_ONNX_FILE} if EMBEDDING_ONNX_FILE else None
+        return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+    return SentenceTransformer(model_name)
+
+
+class Embedder:
+    """
+    One embedding model per process. Concurrent encode() calls are gathered into micro-batches
+    by a background thread, and embeddings of repeated strings are served from an LRU cache.
+    """
+
+    def __init__(self, model=None, cache_size: int = EMBEDDING_CACHE_SIZE,
+                 max_batch: int = EMBEDDING_MAX_BATCH, batch_window: float = EMBEDDING_BATCH_WINDOW):
+        print(f"⏳ Loading embedding model {EMBEDDING_MODEL_NAME} ({EMBEDDING_BACKEND})...")
+        self.model = model or load_sentence_transformer()
+        print("✅ Embedding model loaded!")
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue = queue.Queue()
+
+        self._calls = 0
+        self._hits = 0
+        self._misses = 0
+        self._batches = 0
+        self._batched_texts = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+        threading.Thread(target=self._batch_loop, name="embedder-batcher", daemon=True).start()
+
+    def encode(self, texts: list) -> np.ndarray:
+        """Embed a list of strings; returns an array with one row per input, in order."""
+        if isinstance(texts, str):
+            texts = [texts]
+        results = [None] * len(texts)
+        pending = {}  # text -> Future
+
+        with self._cache_lock:
+            self._calls += 1
+            for i, t in enumerate(texts):
+                if t in self._cache:
+                    self._cache.move_to_end(t)
+                    results[i] = self._cache[t]
+                    self._hits += 1
+                else:
+                    self._misses += 1
+
+        for i, t in enumerate(texts):
+            if results[i] is None and t not in pending:
+                pending[t] = Future()
+                self._queue.put((t, pending[t]))
+
+        for i, t in enumerate(texts):
+            if results[i] is None:
+                results[i] = pending[t].result()
+        return np.vstack(results) if results else np.empty((0, 0))
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: list):
+        # Identical strings from different callers are encoded once
+        unique = list(dict.fromkeys(t for t, _ in batch))
+        started = time.perf_counter()
+        try:
+            vectors = self.model.encode(unique, batch_size=self.max_batch)
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        elapsed = time.perf_counter() - started
+
+        by_text = dict(zip(unique, vectors))
+        with self._cache_lock:
+            self._batches += 1
+            self._batched_texts += len(unique)
+            self._latencies.append(elapsed)
+            for t, v in by_text.items():
+                self._cache[t] = v
+                self._cache.move_to_end(t)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        for t, fut in batch:
+            fut.set_result(by_text[t])
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            latencies = sorted(self._latencies)
+            calls, hits, misses = self._calls, self._hits, self._misses
+            batches, batched = self._batches, self._batched_texts
+            cached = len(self._cache)
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2) if latencies else None
+
+        return {
+            "backend": EMBEDDING_BACKEND,
+            "calls": calls,
+            "cache_hits": hits,
+            "cache_misses": misses,
+            "cache_entries": cached,
+            "batches": batches,
+            "avg_batch_size": round(batched / batches, 2) if batches else None,
+            "encode_ms_p50": pct(0.50),
+            "encode_ms_p95": pct(0.95),
+        }
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder() -> Embedder:
+    """Return the process-wide embedder, loading it on first use."""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = Embedder()
+        return _embedder
+
+
+def embedder_stats():
+    """Metrics of the process-wide embedder, or None if it was never loaded."""
+    return _embedder.stats() if _embedder is not None else None
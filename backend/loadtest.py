@@ -0,0 +1,298 @@
+"""
+Load and soak test for /api/query.
+
+By default starts api.py in a subprocess with the stub LLM and a seeded SQLite database
+(built from the repo's `schema` file), so it runs without a model or MySQL:
+
+    python loadtest.py --concurrency 16 --rate 20 --duration 300 --out loadtest_report.json
+
+Use --url to target an already running server instead (add --pid to sample its RSS).
+"""
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_FILE = os.path.join(BACKEND_DIR, "..", "schema")
+
+DEFAULT_QUESTIONS = [
+    "List all customers in Berlin",
+    "Show orders with status cancelled",
+    "How many products are in the Electronics category?",
+    "Total amount of orders per customer",
+    "Which suppliers are based in Germany?",
+    "Show the 10 most expensive products",
+    "List order items for order 42",
+    "Customers created last month",
+    "Orders for customer Acme in Paris",
+    "Average unit price of order items",
+]
+
+
+def build_sqlite_db(path: str, n_customers: int = 500, n_orders: int = 5000):
+    """Create the tables from `schema` in SQLite and fill them with deterministic sample rows."""
+    rng = random.Random(0)
+    with open(SCHEMA_FILE) as f:
+        ddl = f.read().replace("AUTO_INCREMENT", "")
+    conn = sqlite3.connect(path)
+    conn.executescript(ddl)
+
+    cities = ["Berlin", "Paris", "London", "Madrid", "Rome", "Vienna"]
+    statuses = ["complete", "cancelled", "in progress", "entered", "rejected"]
+    categories = ["Electronics", "Books", "Garden", "Toys", "Office"]
+    countries = ["Germany", "France", "UK", "Spain", "Italy"]
+
+    conn.executemany(
+        "INSERT INTO Customers VALUES (?, ?, ?, ?, ?)",
+        [(i, f"Customer {i}", f"c{i}@example.com", rng.choice(cities), f"2024-{rng.randint(1, 12):02d}-01")
+         for i in range(1, n_customers + 1)],
+    )
+    conn.executemany(
+        "INSERT INTO Orders VALUES (?, ?, ?, ?, ?)",
+        [(i, rng.randint(1, n_customers), f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+          rng.choice(statuses), round(rng.uniform(5, 500), 2))
+         for i in range(1, n_orders + 1)],
+    )
+    conn.executemany(
+        "INSERT INTO Products VALUES (?, ?, ?, ?)",
+        [(i, f"Product {i}", rng.choice(categories), round(rng.uniform(1, 900), 2)) for i in range(1, 201)],
+    )
+    conn.executemany(
+        "INSERT INTO OrderItems VALUES (?, ?, ?, ?, ?)",
+        [(i, rng.randint(1, n_orders), rng.randint(1, 200), rng.randint(1, 5), round(rng.uniform(1, 900), 2))
+         for i in range(1, 2 * n_orders + 1)],
+    )
+    conn.executemany(
+        "INSERT INTO Suppliers VALUES (?, ?, ?, ?)",
+        [(i, f"Supplier {i}", f"s{i}@example.com", rng.choice(countries)) for i in range(1, 51)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def start_server(db_path: str, port: int, stub_latency: float) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        NLP_DB_URI=f"sqlite:///{db_path}",
+        NLP_LLM_BACKEND="stub",
+        NLP_STUB_LLM_LATENCY=str(stub_latency),
+    )
+    # Run without the debug reloader so the PID we sample is the one serving requests
+    code = f"import api; api.app.run(host='127.0.0.1', port={port}, threaded=True, debug=False)"
+    return subprocess.Popen([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env)
+
+
+def wait_healthy(url: str, timeout: float = 120.0, server: subprocess.Popen = None):
+    """Poll /api/health; fail fast if the self-started server process exits first."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode} before becoming healthy")
+        try:
+            with urllib.request.urlopen(f"{url}/api/health", timeout=2) as r:
+                if r.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not become healthy within {timeout:.0f}s")
+
+
+def rss_mb(pid: int):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def send_query(url: str, question: str, timeout: float):
+    """Returns (HTTP status or 0 for a transport error, error message or None)."""
+    body = json.dumps({"question": question}).encode("utf-8")
+    req = urllib.request.Request(f"{url}/api/query", data=body, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            payload = json.loads(r.read())
+            return r.status, payload.get("error")
+    except urllib.error.HTTPError as e:
+        return e.code, e.reason
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        return 0, str(e)
+
+
+def percentile(sorted_values: list, p: float):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+
+def run_load(url: str, questions: list, concurrency: int, rate: float, duration: float,
+             timeout: float, pid: int = None, sample_interval: float = 5.0) -> dict:
+    """
+    rate > 0: open loop, Poisson arrivals at `rate` req/s served by up to `concurrency` in flight.
+              Latency is measured from the scheduled send time, so queueing counts against it.
+    rate = 0: closed loop, `concurrency` clients sending back to back.
+    """
+    results = []  # (start offset s, latency s, status, error)
+    results_lock = threading.Lock()
+    rss_samples = []
+    stop = threading.Event()
+    started = time.perf_counter()
+    rng = random.Random(1)
+
+    def record(scheduled: float, question: str):
+        status, error = send_query(url, question, timeout)
+        now = time.perf_counter()
+        with results_lock:
+            results.append((scheduled - started, now - scheduled, status, error))
+
+    def sample_rss():
+        while not stop.is_set():
+            value = rss_mb(pid)
+            if value is not None:
+                rss_samples.append((round(time.perf_counter() - started, 1), round(value, 1)))
+            stop.wait(sample_interval)
+
+    sampler = None
+    if pid:
+        sampler = threading.Thread(target=sample_rss, daemon=True)
+        sampler.start()
+
+    end = started + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if rate > 0:
+            next_at = started
+            while next_at < end:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(record, next_at, rng.choice(questions))
+                next_at += rng.expovariate(rate)
+        else:
+            def client():
+                while time.perf_counter() < end:
+                    record(time.perf_counter(), rng.choice(questions))
+            for _ in range(concurrency):
+                pool.submit(client)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    if sampler:
+        sampler.join()
+        value = rss_mb(pid)
+        if value is not None:
+            rss_samples.append((round(elapsed, 1), round(value, 1)))
+
+    latencies = sorted(r[1] for r in results)
+    ok = [r for r in results if r[2] == 200 and not r[3]]
+    status_counts = {}
+    for r in results:
+        status_counts[str(r[2])] = status_counts.get(str(r[2]), 0) + 1
+    errors = {}
+    for r in results:
+        if r[2] != 200 or r[3]:
+            reason = r[3] or f"HTTP {r[2]}"
+            errors[reason] = errors.get(reason, 0) + 1
+
+    def ms(v):
+        return round(v * 1000, 1) if v is not None else None
+
+    report = {
+        "config": {
+            "url": url, "concurrency": concurrency, "rate": rate, "duration_s": duration,
+            "timeout_s": timeout, "questions": len(questions),
+        },
+        "requests": len(results),
+        "succeeded": len(ok),
+        "error_rate": round(1 - len(ok) / len(results), 4) if results else None,
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": ms(percentile(latencies, 0.50)),
+            "p90": ms(percentile(latencies, 0.90)),
+            "p95": ms(percentile(latencies, 0.95)),
+            "p99": ms(percentile(latencies, 0.99)),
+            "max": ms(latencies[-1]) if latencies else None,
+        },
+        "status_counts": status_counts,
+        "top_errors": dict(sorted(errors.items(), key=lambda kv: -kv[1])[:10]),
+        "rss_mb": None,
+    }
+    if rss_samples:
+        first, last = rss_samples[0], rss_samples[-1]
+        span_h = (last[0] - first[0]) / 3600
+        report["rss_mb"] = {
+            "start": first[1],
+            "end": last[1],
+            "max": max(v for _, v in rss_samples),
+            "growth_mb_per_hour": round((last[1] - first[1]) / span_h, 1) if span_h else None,
+            "samples": rss_samples,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load/soak test for /api/query")
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="PID of the server at --url, for RSS sampling")
+    parser.add_argument("--port", type=int, default=5055, help="Port for the self-started server")
+    parser.add_argument("--corpus", help="File with one question per line")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0.0, help="Arrivals per second (0 = closed loop)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--stub-latency", type=float, default=0.2, help="Stub LLM seconds per generation")
+    parser.add_argument("--sample-interval", type=float, default=5.0, help="Seconds between RSS samples")
+    parser.add_argument("--out", default="loadtest_report.json")
+    args = parser.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.corpus:
+        with open(args.corpus) as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    server = tmpdir = None
+    url, pid = args.url, args.pid
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmpdir.name, "loadtest.db")
+        build_sqlite_db(db_path)
+        server = start_server(db_path, args.port, args.stub_latency)
+        url, pid = f"http://127.0.0.1:{args.port}", server.pid
+
+    try:
+        wait_healthy(url, server=server)
+        print(f"⏳ Running load against {url} for {args.duration:.0f}s...")
+        report = run_load(url, questions, args.concurrency, args.rate, args.duration,
+                          args.timeout, pid, args.sample_interval)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    summary = {k: v for k, v in report.items() if k != "rss_mb"}
+    print(json.dumps(summary, indent=2))
+    if report["rss_mb"]:
+        rss = report["rss_mb"]
+        print(f"RSS MB: start {rss['start']}, end {rss['end']}, max {rss['max']}, growth/h {rss['growth_mb_per_hour']}")
+    print(f"✅ Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
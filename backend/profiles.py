@@ -0,0 +1,150 @@
+import gc
+import os
+import sys
+import json
+import time
+import threading
+
+from llama_cpp import Llama
+
+from config import BACKEND_DIR, MODEL_PATH, MODEL_PROFILES, TASK_PROFILES, VERBOSE
+
+BENCH_PROMPT = (
+    "Generate an SQL query strictly based on the schema provided.\n\n"
+    "Schema:\nTable: Orders\n  - order_id (INT)\n  - status (VARCHAR(50))\n  - order_date (DATE)\n\n"
+    "Question:\nHow many orders were cancelled last month?\n\n"
+    "Only output SQL code. Do not output any explanation or additional text.\n"
+    "SQL:"
+)
+BENCH_MAX_TOKENS = 128
+
+
+def resolve_profile(name: str, profiles: dict = MODEL_PROFILES) -> dict:
+    """
+    Llama() kwargs for a profile, with model_path made absolute (relative to backend/).
+    Falls back to MODEL_PATH when the profile's own file is missing.
+    """
+    if name not in profiles:
+        raise KeyError(f"Unknown model profile: {name}")
+    profile = dict(profiles[name])
+    path = os.path.join(BACKEND_DIR, profile["model_path"])
+    if not os.path.exists(path):
+        if os.path.exists(MODEL_PATH):
+            print(f"⚠️ Model file for profile '{name}' not found ({path}); using {MODEL_PATH}")
+            path = MODEL_PATH
+        else:
+            raise FileNotFoundError(
+                f"Model file for profile '{name}' not found: {path}. "
+                "Download the GGUF file or change MODEL_PROFILES in backend/config.py."
+            )
+    profile["model_path"] = path
+    return profile
+
+
+class ModelRegistry:
+    """
+    Loads each named model profile at most once, on first use, and routes tasks to their profile.
+    """
+
+    def __init__(self, profiles: dict = MODEL_PROFILES, task_profiles: dict = TASK_PROFILES):
+        self.profiles = profiles
+        self.task_profiles = task_profiles
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, profile: str) -> Llama:
+        with self._lock:
+            if profile not in self._models:
+                kwargs = resolve_profile(profile, self.profiles)
+                print(f"⏳ Loading model profile '{profile}'...")
+                self._models[profile] = Llama(verbose=VERBOSE, **kwargs)
+                print(f"✅ Profile '{profile}' loaded!")
+            return self._models[profile]
+
+    def profile_for(self, task: str) -> str:
+        if task not in self.task_profiles:
+            raise KeyError(f"No model profile configured for task: {task}")
+        return self.task_profiles[task]
+
+    def for_task(self, task: str) -> Llama:
+        return self.get(self.profile_for(task))
+
+    def unload(self, profile: str):
+        with self._lock:
+            self._models.pop(profile, None)
+        gc.collect()
+
+
+_registry = None
+
+
+def get_registry() -> ModelRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
+
+
+def get_llm_for_task(task: str) -> Llama:
+    return get_registry().for_task(task)
+
+
+def _rss_mb() -> float:
+    """Resident set size of this process in MB (Linux)."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def benchmark(profiles: list = None) -> list:
+    """Load each profile in turn and record load time, memory and generation speed on this host."""
+    registry = ModelRegistry()
+    results = []
+    for name in profiles or list(registry.profiles):
+        rss_before = _rss_mb()
+        started = time.perf_counter()
+        llm = registry.get(name)
+        load_s = time.perf_counter() - started
+
+        # Stream so prompt evaluation (until the first token) and generation are timed separately
+        llm.reset()
+        prompt_tokens = len(llm.tokenize(BENCH_PROMPT.encode("utf-8")))
+        completion_tokens = 0
+        started = time.perf_counter()
+        first_token_at = None
+        for _ in llm(BENCH_PROMPT, max_tokens=BENCH_MAX_TOKENS, temperature=0.0, stream=True):
+            completion_tokens += 1
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+        finished = time.perf_counter()
+        prompt_s = (first_token_at or finished) - started
+        eval_s = finished - (first_token_at or finished)
+
+        results.append({
+            "profile": name,
+            **resolve_profile(name, registry.profiles),
+            "load_s": round(load_s, 2),
+            "rss_mb": round(_rss_mb() - rss_before, 1),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "prompt_tokens_per_s": round(prompt_tokens / prompt_s, 2) if prompt_s else None,
+            # The first token is produced by prompt evaluation, so it is excluded here
+            "tokens_per_s": round((completion_tokens - 1) / eval_s, 2) if eval_s and completion_tokens > 1 else None,
+        })
+        del llm
+        registry.unload(name)
+    return results
+
+
+if __name__ == "__main__":
+    # python profiles.py --bench [profile ...]  -> print and save results to profile_bench.json
+    if "--bench" in sys.argv:
+        selected = [a for a in sys.argv[1:] if a != "--bench"]
+        results = benchmark(selected or None)
+        print(json.dumps(results, indent=2))
+        with open("profile_bench.json", "w") as f:
+            json.dump({"host_time": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, f, indent=2)
+    else:
+        print(json.dumps({"profiles": MODEL_PROFILES, "tasks": TASK_PROFILES}, indent=2))
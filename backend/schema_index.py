@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+import hashlib
+
+from sqlalchemy import create_engine, inspect
+import chromadb
+
+from config import (
+    DB_URI, CHROMA_DB_PATH, CHROMA_COLLECTION_NAME, SCHEMA_INDEX_INTERVAL, SCHEMA_RETRIEVAL_TOP_K,
+    EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, EMBEDDING_ONNX_FILE,
+)
+from embedder import get_embedder
+
+ENCODE_BATCH_SIZE = 64
+# Vectors from different models or backends (fp32 torch vs int8 ONNX) must never be mixed
+EMBEDDING_SIGNATURE = "|".join([
+    EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, str(EMBEDDING_ONNX_FILE) if EMBEDDING_BACKEND == "onnx" else "",
+])
+
+
+def get_collection():
+    chroma_client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+    return chroma_client.get_or_create_collection(name=CHROMA_COLLECTION_NAME)
+
+
+def describe_table(name: str, columns: list, fks: list) -> str:
+    """Same natural language chunk format as `step 1`."""
+    cols = [f"{col['name']} ({col['type']})" for col in columns]
+    desc = f"Table '{name}' has columns: " + ", ".join(cols) + "."
+    refs = [
+        f"{fk['referred_table']}.{ref_col}"
+        for fk in fks
+        for ref_col in fk.get("referred_columns", [])
+    ]
+    if refs:
+        desc += " Foreign keys: " + ", ".join(refs) + "."
+    return desc
+
+
+def fingerprint(name: str, columns: list, fks: list) -> str:
+    """Hash of everything that ends up in the chunk and of the embedder that encodes it;
+       changes only when the table's shape or the embedding model/backend changes."""
+    parts = [EMBEDDING_SIGNATURE, name]
+    parts += [f"{col['name']}:{col['type']}" for col in columns]
+    parts += [
+        f"{','.join(fk.get('constrained_columns', []))}->{fk.get('referred_table')}.{','.join(fk.get('referred_columns', []))}"
+        for fk in fks
+    ]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def sync_schema_index(db_uri: str = DB_URI, collection=None) -> dict:
+    """
+    Bring the Chroma schema collection in line with the live database.
+    Only tables whose fingerprint changed are re-embedded; dropped tables are deleted.
+    Safe to re-run: entries are upserted by table id.
+    """
+    collection = collection or get_collection()
+    inspector = inspect(create_engine(db_uri))
+
+    # 1) Fingerprint the live schema
+    live = {}
+    for tbl in inspector.get_table_names():
+        try:
+            columns = inspector.get_columns(tbl)
+            fks = inspector.get_foreign_keys(tbl)
+        except Exception as e:
+            print(f"⚠️ Skipping table {tbl}: {e}")
+            continue
+        live[f"{tbl}_chunk"] = (tbl, columns, fks, fingerprint(tbl, columns, fks))
+
+    # 2) Compare with what is stored
+    stored = collection.get(include=["metadatas"])
+    stored_fp = {
+        id_: (meta or {}).get("fingerprint")
+        for id_, meta in zip(stored["ids"], stored["metadatas"])
+    }
+    changed = [id_ for id_, entry in live.items() if stored_fp.get(id_) != entry[3]]
+    removed = [id_ for id_ in stored_fp if id_ not in live]
+
+    # 3) Re-embed and upsert only what changed, in batches
+    for start in range(0, len(changed), ENCODE_BATCH_SIZE):
+        batch = changed[start:start + ENCODE_BATCH_SIZE]
+        docs = [describe_table(*live[id_][:3]) for id_ in batch]
+        embeddings = get_embedder().encode(docs)
+        collection.upsert(
+            ids=batch,
+            documents=docs,
+            embeddings=[e.tolist() for e in embeddings],
+            metadatas=[
+                {"table_name": live[id_][0], "fingerprint": live[id_][3], "embedding": EMBEDDING_SIGNATURE}
+                for id_ in batch
+            ],
+        )
+
+    # 4) Drop tables that no longer exist
+    if removed:
+        collection.delete(ids=removed)
+
+    return {"tables": len(live), "updated": len(changed), "removed": len(removed)}
+
+
+_serving_collection = None
+
+
+def index_ready() -> bool:
+    """True when the schema index exists and has chunks, i.e. retrieve_tables() can answer."""
+    global _serving_collection
+    if _serving_collection is None:
+        if not os.path.isdir(CHROMA_DB_PATH):
+            return False
+        _serving_collection = get_collection()
+    return _serving_collection.count() > 0
+
+
+def retrieve_tables(question: str, k: int = SCHEMA_RETRIEVAL_TOP_K) -> list:
+    """
+    Names of the k tables whose schema chunks are closest to the question.
+    Only chunks embedded with the current embedder are searched. Returns [] when the index
+    has not been built (or not re-synced since the embedder changed), so callers can fall back.
+    """
+    if not index_ready():
+        return []
+    query_embedding = get_embedder().encode([question])
+    results = _serving_collection.query(
+        query_embeddings=query_embedding.tolist(),
+        n_results=k,
+        where={"embedding": EMBEDDING_SIGNATURE},
+        include=["metadatas"],
+    )
+    return [meta["table_name"] for meta in results["metadatas"][0]]
+
+
+def run_forever(interval: int = SCHEMA_INDEX_INTERVAL):
+    """Scheduled mode: re-sync every `interval` seconds."""
+    while True:
+        started = time.time()
+        try:
+            stats = sync_schema_index()
+            print(f"✅ Schema index synced in {time.time() - started:.1f}s: {stats}")
+        except Exception as e:
+            print(f"⚠️ Schema index sync failed: {e}")
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    # python schema_index.py          -> sync once
+    # python schema_index.py --watch  -> re-sync every SCHEMA_INDEX_INTERVAL seconds
+    if "--watch" in sys.argv:
+        run_forever()
+    else:
+        print(f"✅ {sync_schema_index()}")
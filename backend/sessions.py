@@ -0,0 +1,107 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+
+from config import SESSION_IDLE_TTL, SESSION_MAX_BYTES, SESSION_MAX_COUNT
+
+
+def state_size(state) -> int:
+    """Approximate memory held by a saved llama-cpp state."""
+    if state is None:
+        return 0
+    return state.llama_state_size + state.input_ids.nbytes + state.scores.nbytes
+
+
+class Session:
+    """Conversation context kept between questions of one user."""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.last_used = time.time()
+        self.lock = threading.Lock()  # One question at a time per session
+        self.prompt = None  # Full prompt of the last turn
+        self.answer = None  # Raw model output of the last turn
+        self.state = None  # Model state after the last turn (prompt + answer evaluated)
+        self.tables = []
+        self.schema_text = None
+        self.sql = None
+
+    @property
+    def nbytes(self) -> int:
+        return state_size(self.state)
+
+    def has_history(self) -> bool:
+        return self.prompt is not None
+
+
+class SessionStore:
+    """
+    In-memory sessions, evicted when idle for longer than idle_ttl and, least recently used
+    first, whenever the saved model states exceed max_bytes or there are more than max_count.
+    Session ids are always generated here; clients can only resume ids they were given.
+    """
+
+    def __init__(self, idle_ttl: int = SESSION_IDLE_TTL, max_bytes: int = SESSION_MAX_BYTES,
+                 max_count: int = SESSION_MAX_COUNT):
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.max_count = max_count
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self) -> Session:
+        with self._lock:
+            self._evict_idle()
+            session = Session(uuid.uuid4().hex)
+            self._sessions[session.id] = session
+            self._evict_over_count(keep=session.id)
+            return session
+
+    def get(self, session_id: str):
+        """Return the live session with this id, or None if it is unknown or expired."""
+        with self._lock:
+            self._evict_idle()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session.last_used = time.time()
+            self._sessions.move_to_end(session.id)
+            return session
+
+    def touch(self, session: Session):
+        """Call after a turn has updated the session's state, to enforce the memory cap."""
+        with self._lock:
+            session.last_used = time.time()
+            self._evict_over_cap(keep=session.id)
+
+    def _evict_idle(self):
+        cutoff = time.time() - self.idle_ttl
+        for sid in [sid for sid, s in self._sessions.items() if s.last_used < cutoff]:
+            del self._sessions[sid]
+
+    def _evict_over_count(self, keep: str = None):
+        for sid in list(self._sessions):
+            if len(self._sessions) <= self.max_count:
+                break
+            if sid == keep or self._sessions[sid].lock.locked():
+                continue
+            del self._sessions[sid]
+
+    def _evict_over_cap(self, keep: str = None):
+        total = sum(s.nbytes for s in self._sessions.values())
+        for sid in list(self._sessions):
+            if total <= self.max_bytes:
+                break
+            session = self._sessions[sid]
+            if sid == keep or session.lock.locked():
+                continue  # Mid-turn; its state is about to be replaced anyway
+            total -= session.nbytes
+            del self._sessions[sid]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "state_bytes": sum(s.nbytes for s in self._sessions.values()),
+            }
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+import numpy as np
+from llama_cpp import Llama, LlamaState
+
+from config import MODEL_PROFILES, PROMPT_STATE_DIR, PROMPT_STATE_MAX_BYTES, PROMPT_STATE_MAX_AGE
+
+SAMPLE_BYTES = 4 * 1024 * 1024  # Hashing a multi-GB GGUF fully would dominate startup
+TMP_GRACE = 60 * 60  # Seconds before an unfinished save (".tmp" dir) counts as abandoned
+
+_model_keys = {}
+
+
+def model_key(model_path: str) -> str:
+    """Hash identifying a model file: size, plus its first and last SAMPLE_BYTES."""
+    st = os.stat(model_path)
+    cache_key = (model_path, st.st_size, st.st_mtime)
+    if cache_key not in _model_keys:
+        h = hashlib.sha256(str(st.st_size).encode())
+        with open(model_path, "rb") as f:
+            h.update(f.read(SAMPLE_BYTES))
+            f.seek(max(0, st.st_size - SAMPLE_BYTES))
+            h.update(f.read(SAMPLE_BYTES))
+        _model_keys[cache_key] = h.hexdigest()
+    return _model_keys[cache_key]
+
+
+class PromptStateStore:
+    """
+    Evaluated prompt prefixes saved to disk, keyed by model file hash, context size and prompt hash.
+    Token and score arrays are memory-mapped back on load. gc() drops entries for other model files,
+    entries not used for max_age seconds, and then the least recently used ones until under max_bytes;
+    it runs after every save.
+    """
+
+    def __init__(self, root: str = PROMPT_STATE_DIR, max_bytes: int = PROMPT_STATE_MAX_BYTES,
+                 max_age: int = PROMPT_STATE_MAX_AGE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.model_keys = None  # Set by collect_garbage(); entries of other model files are dropped
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, llama: Llama, prompt: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        raw = f"{model_key(llama.model_path)}:{llama.n_ctx()}:{prompt_hash}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def load(self, key: str):
+        path = self._dir(key)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            input_ids = np.load(os.path.join(path, "input_ids.npy"), mmap_mode="r")
+            scores = np.load(os.path.join(path, "scores.npy"), mmap_mode="r")
+            # llama.cpp copies the state into the context from a bytes buffer, so read it whole
+            with open(os.path.join(path, "llama_state.bin"), "rb") as f:
+                llama_state = f.read()
+        except (OSError, ValueError):
+            return None
+        os.utime(os.path.join(path, "meta.json"))  # Mark as recently used for gc()
+        kwargs = {}
+        if meta.get("seed") is not None:
+            kwargs["seed"] = meta["seed"]
+        return LlamaState(
+            input_ids=input_ids,
+            scores=scores,
+            n_tokens=meta["n_tokens"],
+            llama_state=llama_state,
+            llama_state_size=meta["llama_state_size"],
+            **kwargs,
+        )
+
+    def save(self, key: str, state: LlamaState, llama: Llama):
+        path = self._dir(key)
+        tmp = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        os.makedirs(tmp, exist_ok=True)
+        np.save(os.path.join(tmp, "input_ids.npy"), np.asarray(state.input_ids))
+        np.save(os.path.join(tmp, "scores.npy"), np.asarray(state.scores))
+        with open(os.path.join(tmp, "llama_state.bin"), "wb") as f:
+            f.write(bytes(state.llama_state))
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({
+                "model_key": model_key(llama.model_path),
+                "n_ctx": llama.n_ctx(),
+                "n_tokens": state.n_tokens,
+                "llama_state_size": state.llama_state_size,
+                "seed": getattr(state, "seed", None),
+                "created": time.time(),
+            }, f)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # Another process saved it first
+        self.gc(self.model_keys)
+
+    def gc(self, current_model_keys: set = None) -> int:
+        """Remove stale entries; returns the number removed."""
+        now = time.time()
+        entries = []
+        removed = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            meta_path = os.path.join(path, "meta.json")
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                last_used = os.path.getmtime(meta_path)
+            except (OSError, ValueError):
+                # Leftover tmp dir or corrupt entry; leave saves that may still be in progress
+                try:
+                    if ".tmp" in name and now - os.path.getmtime(path) < TMP_GRACE:
+                        continue
+                except OSError:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+                continue
+            stale_model = current_model_keys is not None and meta["model_key"] not in current_model_keys
+            if stale_model or now - last_used > self.max_age:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+                continue
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((last_used, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def warm_prefix(llama: Llama, prefix: str, store: PromptStateStore, save: bool = True):
+    """
+    Make sure `prefix` is evaluated in the model's context: no-op if it already is,
+    otherwise restore it from the store or, if `save`, evaluate it once and save it.
+    Any prompt starting with `prefix` then only evaluates the remainder.
+    Request paths pass save=False so they never write a snapshot synchronously.
+    """
+    tokens = llama.tokenize(prefix.encode("utf-8"))
+    if llama.n_tokens >= len(tokens) and list(llama.input_ids[:len(tokens)]) == tokens:
+        return
+    key = store.key(llama, prefix)
+    state = store.load(key)
+    if state is not None:
+        llama.load_state(state)
+        return
+    if not save:
+        return
+    llama.reset()
+    llama.eval(tokens)
+    store.save(key, llama.save_state(), llama)
+
+
+_store = None
+
+
+def get_state_store() -> PromptStateStore:
+    global _store
+    if _store is None:
+        _store = PromptStateStore()
+    return _store
+
+
+def collect_garbage() -> int:
+    """Startup cleanup: drop entries of model files no longer in MODEL_PROFILES, then old/excess ones."""
+    keys = {
+        model_key(p["model_path"]) for p in MODEL_PROFILES.values() if os.path.exists(p["model_path"])
+    }
+    store = get_state_store()
+    store.model_keys = keys
+    return store.gc(keys)
@@ -0,0 +1,32 @@
+import re
+import time
+
+from config import STUB_LLM_LATENCY, N_CTX
+
+CHARS_PER_TOKEN = 3  # Conservative estimate; the stub has no tokenizer
+
+
+class StubLLM:
+    """
+    Stand-in for MistralLLM that needs no model file: waits STUB_LLM_LATENCY seconds and
+    answers with a simple SELECT on the first table of the prompt's schema.
+    Used by loadtest.py to exercise the API, DB and Flask overhead offline.
+    """
+
+    def __init__(self, latency: float = STUB_LLM_LATENCY):
+        self.latency = latency
+        print("✅ Stub LLM ready (no model loaded)")
+
+    def __call__(self, prompt: str) -> str:
+        if not self.fits(prompt, max_tokens=0):
+            raise ValueError(f"Prompt exceeds context window of {N_CTX} tokens")
+        time.sleep(self.latency)
+        match = re.search(r"^(?:Table:|TABLE)\s+(\w+)", prompt, re.MULTILINE)
+        table = match.group(1) if match else "Customers"
+        return f"SELECT * FROM {table} LIMIT 10;"
+
+    def generate_with_state(self, prompt: str, state=None):
+        return self(prompt), None
+
+    def fits(self, prompt: str, max_tokens: int = 512) -> bool:
+        return len(prompt) // CHARS_PER_TOKEN + max_tokens <= N_CTX
@@ -0,0 +1,125 @@
+import re
+import time
+import threading
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.types import String, Text
+
+from config import VALUE_INDEX_MAX_DISTINCT, VALUE_INDEX_MAX_VALUES, VALUE_INDEX_REFRESH
+
+MAX_VALUE_LEN = 64  # Longer strings are free text, not entity names
+MAX_VALUE_WORDS = 4
+
+_word_re = re.compile(r"\w+")
+
+
+def normalize(value: str) -> str:
+    return " ".join(_word_re.findall(value.lower()))
+
+
+class ValueIndex:
+    """
+    Inverted index of distinct values of low-cardinality text columns (city, status, country...).
+    Built in a background thread and rebuilt periodically; lookups never touch the database.
+    """
+
+    def __init__(self, db_uri: str, max_distinct: int = VALUE_INDEX_MAX_DISTINCT,
+                 max_values: int = VALUE_INDEX_MAX_VALUES, refresh: int = VALUE_INDEX_REFRESH):
+        self.db_uri = db_uri
+        self.max_distinct = max_distinct
+        self.max_values = max_values
+        self.refresh = refresh
+        # normalized value -> [(table, column, literal value), ...]
+        self._values = {}
+        self._max_words = 1
+        self.built_at = None
+
+    def start(self):
+        thread = threading.Thread(target=self._run, name="value-index", daemon=True)
+        thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                started = time.time()
+                self.build()
+                print(f"✅ Value index built: {len(self._values)} values in {time.time() - started:.1f}s")
+            except Exception as e:
+                print(f"⚠️ Value index build failed: {e}")
+            time.sleep(self.refresh)
+
+    def build(self):
+        engine = create_engine(self.db_uri)
+        inspector = inspect(engine)
+        quote = engine.dialect.identifier_preparer.quote
+        values = {}
+        count = 0
+
+        with engine.connect() as connection:
+            for tbl in inspector.get_table_names():
+                try:
+                    columns = inspector.get_columns(tbl)
+                except Exception:
+                    continue
+                for col in columns:
+                    if count >= self.max_values:
+                        break
+                    col_type = col["type"]
+                    if not isinstance(col_type, String):
+                        continue
+                    if isinstance(col_type, Text) or (col_type.length and col_type.length > 255):
+                        continue  # TEXT-like columns are never low cardinality
+                    q_tbl, q_col = quote(tbl), quote(col["name"])
+                    try:
+                        # Stops after max_distinct + 1 values instead of counting every distinct value
+                        n_distinct = connection.execute(
+                            text(f"SELECT COUNT(*) FROM (SELECT DISTINCT {q_col} FROM {q_tbl} "
+                                 f"WHERE {q_col} IS NOT NULL LIMIT {int(self.max_distinct) + 1}) AS d")
+                        ).scalar()
+                        if not n_distinct or n_distinct > self.max_distinct:
+                            continue
+                        rows = connection.execute(
+                            text(f"SELECT DISTINCT {q_col} FROM {q_tbl} WHERE {q_col} IS NOT NULL")
+                        ).fetchall()
+                    except Exception:
+                        continue
+                    for (value,) in rows:
+                        if count >= self.max_values:
+                            break
+                        if not isinstance(value, str) or not 2 <= len(value) <= MAX_VALUE_LEN:
+                            continue
+                        key = normalize(value)
+                        if not key or key.isdigit():
+                            continue
+                        values.setdefault(key, []).append((tbl, col["name"], value))
+                        count += 1
+                if count >= self.max_values:
+                    break
+
+        # Swap in one assignment so readers never see a half-built index
+        self._max_words = min(MAX_VALUE_WORDS, max((len(k.split()) for k in values), default=1))
+        self._values = values
+        self.built_at = time.time()
+
+    def match(self, question: str) -> list:
+        """Return the indexed values that appear in the question, longest phrases first.
+           Words inside a longer match are not matched again ("in progress" does not also yield "in")."""
+        values = self._values
+        words = normalize(question).split()
+        used = [False] * len(words)
+        matches = []
+        seen = set()
+        for n in range(self._max_words, 0, -1):
+            for i in range(len(words) - n + 1):
+                if any(used[i:i + n]):
+                    continue
+                key = " ".join(words[i:i + n])
+                if key not in values:
+                    continue
+                used[i:i + n] = [True] * n
+                for tbl, col, value in values[key]:
+                    if (tbl, col, value) not in seen:
+                        seen.add((tbl, col, value))
+                        matches.append({"table": tbl, "column": col, "value": value})
+        return matches
@@ -0,0 +1,273 @@
+import os
+import threading
+import multiprocessing as mp
+
+from config import TASK_PROFILES, VERBOSE, N_WORKERS, WORKER_THREADS
+from profiles import resolve_profile
+
+# Fork keeps startup cheap; the pool starts before the server has any other threads.
+_ctx = mp.get_context("fork")
+# Restarts happen while the server runs threads (value index, embedder, warmup), so fork is unsafe there.
+_restart_ctx = mp.get_context("spawn")
+
+POLL_INTERVAL = 1.0  # Seconds between liveness checks while waiting on a worker
+
+
+def _parse_cpulist(text: str) -> list:
+    """Parse a sysfs cpulist such as '0-7,16-23' into a list of core ids."""
+    cores = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-")
+            cores.extend(range(int(lo), int(hi) + 1))
+        else:
+            cores.append(int(part))
+    return cores
+
+
+def numa_core_sets() -> list:
+    """Return the cores we may run on, grouped by NUMA node (one group per socket).
+       Falls back to a single group when sysfs has no node information."""
+    allowed = os.sched_getaffinity(0)
+    node_root = "/sys/devices/system/node"
+    groups = []
+    try:
+        nodes = sorted(d for d in os.listdir(node_root) if d.startswith("node") and d[4:].isdigit())
+        for node in nodes:
+            with open(os.path.join(node_root, node, "cpulist")) as f:
+                cores = [c for c in _parse_cpulist(f.read()) if c in allowed]
+            if cores:
+                groups.append(cores)
+    except OSError:
+        groups = []
+    return groups or [sorted(allowed)]
+
+
+def split_core_sets(n_workers: int) -> list:
+    """Split the available cores into n_workers disjoint sets.
+       Workers are spread over NUMA nodes first so no worker straddles two sockets."""
+    groups = numa_core_sets()
+    total = sum(len(g) for g in groups)
+    if n_workers < 1 or n_workers > total:
+        raise ValueError(f"N_WORKERS must be between 1 and the {total} available cores, got {n_workers}")
+
+    # How many workers each node gets, proportional to its core count, never more than its cores
+    shares = [min(len(g), max(1, round(n_workers * len(g) / total))) for g in groups]
+    while sum(shares) > n_workers:
+        # Take from the node with the fewest cores per worker
+        i = max((i for i in range(len(groups)) if shares[i]), key=lambda i: shares[i] / len(groups[i]))
+        shares[i] -= 1
+    while sum(shares) < n_workers:
+        room = [i for i, g in enumerate(groups) if shares[i] < len(g)]
+        i = min(room, key=lambda i: shares[i] / len(groups[i]))
+        shares[i] += 1
+
+    core_sets = []
+    for cores, share in zip(groups, shares):
+        if share == 0:
+            continue
+        size = max(1, len(cores) // share)
+        for i in range(share):
+            chunk = cores[i * size:(i + 1) * size] if i < share - 1 else cores[i * size:]
+            core_sets.append(chunk)
+    return core_sets
+
+
+def _worker_main(conn, cores: list, n_threads: int, profile: dict, verbose: bool):
+    """Entry point of a model worker process: pin, load the model, serve prompts until closed."""
+    from core import MistralLLM
+
+    os.sched_setaffinity(0, cores)
+    # llama-cpp mmaps the GGUF read-only, so all workers share the same page cache copy
+    llm = MistralLLM(model_path=profile["model_path"], n_ctx=profile["n_ctx"], n_threads=n_threads, verbose=verbose)
+    conn.send(("ready", None))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        try:
+            if isinstance(message, tuple) and message[0] == "warm":
+                # ("warm", prefix): evaluate or restore a prompt prefix from the on-disk store
+                llm.warm_prefix(message[1])
+                conn.send(("ok", None))
+            else:
+                conn.send(("ok", llm(message)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+    conn.close()
+
+
+class WorkerDied(RuntimeError):
+    pass
+
+
+class _Worker:
+    def __init__(self, index: int, cores: list, n_threads: int, profile: dict):
+        self.index = index
+        self.cores = cores
+        self.n_threads = n_threads
+        self.profile = profile
+        self.lock = threading.Lock()  # One prompt at a time per worker
+        self.inflight = 0  # Requests running or waiting on this worker
+        self.ready = False  # Model loaded and process alive
+        self.restarts = 0
+        self.conn = self.process = None
+
+    def start(self, ctx=_ctx):
+        # Pipe and process are created only now and the child end is closed right after the fork,
+        # so no other worker inherits this pipe and the parent sees EOF as soon as the worker dies
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.cores, self.n_threads, self.profile, VERBOSE),
+            name=f"mistral-worker-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def _recv(self):
+        """Wait for the worker's reply, raising EOFError if the process exits first."""
+        while not self.conn.poll(POLL_INTERVAL):
+            if not self.process.is_alive():
+                raise EOFError
+        return self.conn.recv()
+
+    def wait_ready(self):
+        try:
+            status, payload = self._recv()
+        except (EOFError, OSError):
+            status, payload = "error", f"exited with code {self.process.exitcode}"
+        if status != "ready":
+            raise RuntimeError(f"Worker {self.index} failed to start: {payload}")
+        self.ready = True
+
+    def alive(self) -> bool:
+        return self.ready and self.process.is_alive()
+
+    def restart(self):
+        """Replace a dead worker process with a fresh one on the same cores."""
+        self.ready = False
+        self.process.join(timeout=0)
+        self.conn.close()
+        self.restarts += 1
+        self.start(_restart_ctx)
+        self.wait_ready()
+
+    def ask(self, prompt: str) -> str:
+        with self.lock:
+            try:
+                self.conn.send(prompt)
+                status, payload = self._recv()
+            except (EOFError, OSError):
+                # Process died mid-request (OOM, llama.cpp crash)
+                self.ready = False
+                raise WorkerDied(f"Worker {self.index} died (exit code {self.process.exitcode})")
+        if status == "error":
+            raise RuntimeError(payload)
+        return payload
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+
+
+class WorkerPool:
+    """
+    Runs one model instance per core set in separate processes and routes each prompt
+    to the least-loaded live worker. Dead workers are skipped and respawned in the background.
+    Callable like MistralLLM, so it can be passed to process_question().
+    """
+
+    def __init__(self, n_workers: int = N_WORKERS, threads_per_worker: int = WORKER_THREADS, task: str = "sql"):
+        core_sets = split_core_sets(n_workers)
+        profile = resolve_profile(TASK_PROFILES[task])
+        self.workers = [
+            _Worker(i, cores, threads_per_worker or len(cores), profile)
+            for i, cores in enumerate(core_sets)
+        ]
+        self._route_lock = threading.Lock()
+        self._restarting = set()
+
+    def start(self):
+        print(f"⏳ Starting {len(self.workers)} model workers...")
+        for w in self.workers:
+            w.start()
+        for w in self.workers:
+            w.wait_ready()
+            print(f"✅ Worker {w.index} ready on cores {w.cores}")
+        return self
+
+    def _pick(self) -> _Worker:
+        with self._route_lock:
+            live = []
+            for w in self.workers:
+                if w.alive():
+                    live.append(w)
+                elif w.index not in self._restarting:
+                    self._restarting.add(w.index)
+                    threading.Thread(target=self._restart, args=(w,), daemon=True).start()
+            if not live:
+                raise RuntimeError("No model workers available")
+            worker = min(live, key=lambda w: w.inflight)
+            worker.inflight += 1
+            return worker
+
+    def _restart(self, worker: _Worker):
+        try:
+            print(f"⚠️ Worker {worker.index} is dead, restarting...")
+            worker.restart()
+            print(f"✅ Worker {worker.index} restarted on cores {worker.cores}")
+        except Exception as e:
+            print(f"⚠️ Worker {worker.index} restart failed: {e}")
+        finally:
+            with self._route_lock:
+                self._restarting.discard(worker.index)
+
+    def __call__(self, prompt: str) -> str:
+        # One retry on another worker if the chosen one dies under us
+        for attempt in range(2):
+            worker = self._pick()
+            try:
+                return worker.ask(prompt)
+            except WorkerDied:
+                if attempt == 1:
+                    raise
+            finally:
+                with self._route_lock:
+                    worker.inflight -= 1
+
+    def warm_prefix(self, prefix: str, save: bool = True):
+        """
+        Warm the prefix on every live worker (startup only). Request-time restores (save=False)
+        are skipped: a request may land on any worker, so they would have to hit all of them.
+        """
+        if not save:
+            return
+        for w in self.workers:
+            if w.alive():
+                w.ask(("warm", prefix))
+
+    def stats(self) -> list:
+        return [
+            {"worker": w.index, "cores": w.cores, "inflight": w.inflight, "alive": w.alive(), "restarts": w.restarts}
+            for w in self.workers
+        ]
+
+    def stop(self):
+        for w in self.workers:
+            w.stop()
+
+
+def start_worker_pool(n_workers: int = N_WORKERS) -> WorkerPool:
+    return WorkerPool(n_workers=n_workers).start()
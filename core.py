@@ -20,17 +20,14 @@ import torch
 # ----- New: Use Mistral-7B-Instruct-v0-2.Q4_km.gguf via llama-cpp-python -----
 from llama_cpp import Llama
 
+# Model path, context size and threads come from the shared profiles in backend/config.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from profiles import get_llm_for_task
+
 # Define a wrapper so our LLM interface remains the same:
 class MistralLLM:
-    def __init__(self, model_path: str, n_ctx: int, n_threads: int, verbose: bool):
-        print("⏳ Loading Mistral-7B-Instruct model (llama-cpp)...")
-        self.llama = Llama(
-            model_path=model_path,
-            n_ctx=n_ctx,
-            n_threads=n_threads,
-            verbose=verbose
-        )
-        print("✅ Model loaded!")
+    def __init__(self, llama: Llama):
+        self.llama = llama
     
     def __call__(self, prompt: str) -> str:
         # Call the model and return the generated text.
@@ -41,15 +38,10 @@ class MistralLLM:
         # Expecting output in the form: {"choices": [{"text": "..."}], ...}
         return output["choices"][0]["text"].strip()
 
-# Set your model path and parameters here:
-MODEL_PATH = "mistral-7b-instruct-v0.2.Q4_K_M.gguf"  # Replace with your actual model path
-N_CTX = 2048
-N_THREADS = 6
-VERBOSE = True
 # ----- End New Model Loading Section -----
 
 def load_mistral_llm():
-    return MistralLLM(model_path=MODEL_PATH, n_ctx=N_CTX, n_threads=N_THREADS, verbose=VERBOSE)
+    return MistralLLM(get_llm_for_task("sql"))
 
 def pick_tables(question: str, all_tables: list) -> list:
     """Naive approach: pick tables whose names appear in the user's question.
@@ -0,0 +1,69 @@
+# api.py
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+
+from jobs import JobManager, JobQueueFull
+
+# Initialize Flask app
+app = Flask(__name__)
+CORS(app)
+
+jobs = JobManager()
+
+# Submit a report job; identical filters already in flight return the existing job
+@app.route("/api/jobs", methods=["POST"])
+def submit_job():
+    data = request.get_json()
+    if not data or not isinstance(data.get("filters"), dict):
+        return jsonify({"error": "Missing 'filters' object in request body"}), 400
+    if not data["filters"].get("start_date"):
+        return jsonify({"error": "Missing 'start_date' in filters"}), 400
+
+    try:
+        job, deduplicated = jobs.submit(data["filters"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except JobQueueFull as e:
+        return jsonify({"error": f"Too many pending jobs: {e}"}), 429
+
+    return jsonify({**job.to_dict(), "deduplicated": deduplicated}), 202
+
+# Poll status and progress
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+# Download results one page at a time (pages appear while the job is still running)
+@app.route("/api/jobs/<job_id>/results", methods=["GET"])
+def job_results(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    page = request.args.get("page", default=0, type=int)
+    if page < 0 or page >= job.pages:
+        if job.status in {"queued", "running"}:
+            return jsonify({"error": "Page not ready yet", **job.to_dict()}), 409
+        return jsonify({"error": "Page out of range", **job.to_dict()}), 404
+
+    try:
+        rows = jobs.read_page(job, page)
+    except FileNotFoundError:
+        # Cleanup removed the spool between the lookup and the read
+        return jsonify({"error": "Job results expired"}), 404
+
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status,
+        "page": page,
+        "pages": job.pages,
+        "columns": job.columns,
+        "rows": rows,
+    })
+
+# Run the app
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=5001)
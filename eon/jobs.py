@@ -0,0 +1,180 @@
+# jobs.py
+import os
+import json
+import gzip
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from date_util import convert_to_sql_dates
+from sql_builder import build_sql_query, validate_filters
+from db_connection import get_db_connection
+
+JOB_WORKERS = 2  # Report queries running at once
+JOB_MAX_QUEUED = 20  # Submissions beyond this are rejected until the queue drains
+JOB_PAGE_ROWS = 1000  # Rows per spool page (one gzip file each)
+JOB_TTL = 24 * 60 * 60  # Seconds a finished job and its spool are kept
+JOB_SPOOL_DIR = "./job_spool"
+JOB_CLEANUP_INTERVAL = 10 * 60  # Seconds between sweeps of expired jobs
+
+FILTER_KEYS = ["source_system", "order_type", "order_status", "order_action", "start_date", "end_date"]
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def filters_key(filters: dict) -> str:
+    """Identical requests (case/whitespace aside) map to the same key."""
+    normalized = {
+        k: str(filters.get(k) or "").strip().lower()
+        for k in FILTER_KEYS
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+class Job:
+    def __init__(self, filters: dict):
+        self.id = uuid.uuid4().hex
+        self.key = filters_key(filters)
+        self.filters = filters
+        self.status = "queued"  # queued -> running -> done | failed
+        self.error = None
+        self.columns = []
+        self.rows = 0
+        self.pages = 0
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def spool_dir(self) -> str:
+        return os.path.join(JOB_SPOOL_DIR, self.id)
+
+    def page_path(self, page: int) -> str:
+        return os.path.join(self.spool_dir, f"page-{page:06d}.jsonl.gz")
+
+    def to_dict(self) -> dict:
+        end = self.finished or time.time()
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "rows": self.rows,
+            "pages": self.pages,
+            "page_rows": JOB_PAGE_ROWS,
+            "submitted": self.submitted,
+            "elapsed_s": round(end - self.started, 1) if self.started else 0,
+        }
+
+
+class JobManager:
+    """
+    Runs report queries on a bounded worker pool and spools their rows to gzip pages on disk.
+    Submitting filters identical to a queued or running job returns that job instead of a new one.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_queued: int = JOB_MAX_QUEUED):
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-job")
+        self._jobs = {}
+        self._active = {}  # filters key -> job, while queued or running
+        self._lock = threading.Lock()
+        # Jobs live in memory only, so spools left by a crashed process are never served; drop
+        # those past JOB_TTL (younger ones may belong to another process using the same directory)
+        os.makedirs(JOB_SPOOL_DIR, exist_ok=True)
+        cutoff = time.time() - JOB_TTL
+        for name in os.listdir(JOB_SPOOL_DIR):
+            path = os.path.join(JOB_SPOOL_DIR, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+        threading.Thread(target=self._sweep, name="report-job-cleanup", daemon=True).start()
+
+    def submit(self, filters: dict):
+        """Returns (job, deduplicated). Raises ValueError for filters outside the allowed options."""
+        filters = validate_filters(filters)
+        with self._lock:
+            self._cleanup()
+            key = filters_key(filters)
+            if key in self._active:
+                return self._active[key], True
+            queued = sum(1 for j in self._active.values() if j.status == "queued")
+            if queued >= self.max_queued:
+                raise JobQueueFull(f"{queued} jobs already queued")
+            job = Job(filters)
+            self._jobs[job.id] = job
+            self._active[key] = job
+        self._executor.submit(self._run, job)
+        return job, False
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def read_page(self, job: Job, page: int) -> list:
+        """Raises FileNotFoundError if the job expired and its spool was removed meanwhile."""
+        with gzip.open(job.page_path(page), "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def _run(self, job: Job):
+        job.status = "running"
+        job.started = time.time()
+        conn = cursor = None
+        try:
+            # Dates are resolved at execution time, so "last week" means last week when it runs
+            filters = dict(job.filters)
+            filters["start_date"], filters["end_date"] = convert_to_sql_dates(
+                filters.get("start_date", ""),
+                filters.get("end_date", None)
+            )
+            try:
+                conn = get_db_connection()
+            except SystemExit:
+                raise RuntimeError("Could not establish DB connection")
+            cursor = conn.cursor()
+            cursor.execute(*build_sql_query(filters))
+            job.columns = [d[0] for d in cursor.description]
+
+            os.makedirs(job.spool_dir, exist_ok=True)
+            while True:
+                batch = cursor.fetchmany(JOB_PAGE_ROWS)
+                if not batch:
+                    break
+                tmp = job.page_path(job.pages) + ".tmp"
+                with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                    for row in batch:
+                        f.write(json.dumps(dict(zip(job.columns, row)), default=str) + "\n")
+                os.rename(tmp, job.page_path(job.pages))
+                # Page becomes readable only once fully written
+                job.rows += len(batch)
+                job.pages += 1
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished = time.time()
+            if cursor is not None:
+                cursor.close()
+            if conn is not None:
+                conn.close()
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+
+    def _sweep(self):
+        while True:
+            time.sleep(JOB_CLEANUP_INTERVAL)
+            with self._lock:
+                self._cleanup()
+
+    def _cleanup(self):
+        cutoff = time.time() - JOB_TTL
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+            shutil.rmtree(self._jobs[job_id].spool_dir, ignore_errors=True)
+            del self._jobs[job_id]
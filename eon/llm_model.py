@@ -1,10 +1,11 @@
 # llm_model.py
-from llama_cpp import Llama
+import os
+import sys
 
-MODEL_PATH = "mistral-7b-instruct-v0.2.Q4_K_M.gguf"  # Replace with your actual model path
-N_CTX = 2048
-N_THREADS = 6
-VERBOSE = True
+# Model path, context size and threads come from the task profiles in backend/config.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from profiles import get_llm_for_task
+from state_store import warm_prefix, get_state_store, collect_garbage
 
 PROMPT_TEMPLATE = """
 You are an assistant that extracts filters for querying orders from different source systems.
@@ -56,11 +57,10 @@ Rules:
 """.strip()
 
 def get_llm():
-    """Instantiate and return the LLM model."""
-    llm = Llama(
-        model_path=MODEL_PATH,
-        n_ctx=N_CTX,
-        n_threads=N_THREADS,
-        verbose=VERBOSE
-    )
-    return llm
+    """Return the LLM model for filter extraction (loaded once, on first use)."""
+    return get_llm_for_task("eon_filters")
+
+def warm_prompt_cache(llm):
+    """Evaluate PROMPT_TEMPLATE once, or restore it from disk after a restart."""
+    collect_garbage()
+    warm_prefix(llm, f"{PROMPT_TEMPLATE}\n\nInput: \"", get_state_store())
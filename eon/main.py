@@ -1,9 +1,9 @@
 # main.py
 import sys
 import json
-from llm_model import get_llm, PROMPT_TEMPLATE
+from llm_model import get_llm, warm_prompt_cache, PROMPT_TEMPLATE
 from date_util import convert_to_sql_dates
-from sql_builder import build_sql_query
+from sql_builder import build_sql_query, validate_filters
 from db_connection import get_db_connection
 
 def main():
@@ -13,6 +13,7 @@ def main():
 
     # Instantiate the LLM model.
     llm = get_llm()
+    warm_prompt_cache(llm)
 
     print("Type your queries (or 'exit' to quit).")
 
@@ -39,6 +40,13 @@ def main():
             print(f"\nError parsing JSON: {e}")
             continue
 
+        # Reject filter values outside the allowed options before they reach SQL.
+        try:
+            response_data = validate_filters(response_data)
+        except ValueError as e:
+            print(f"\nInvalid filters: {e}")
+            continue
+
         # Convert fuzzy dates to SQL-compatible format.
         try:
             start_sql, end_sql = convert_to_sql_dates(
@@ -55,11 +63,11 @@ def main():
         print(json.dumps(response_data, indent=2))
 
         # Build the final SQL query using the extracted filters.
-        final_sql = build_sql_query(response_data)
+        final_sql, params = build_sql_query(response_data)
         print("\nExecuting SQL Query against the database...")
 
         try:
-            cursor.execute(final_sql)
+            cursor.execute(final_sql, params)
             rows = cursor.fetchall()
             # Print out the results (format as needed)
             if rows:
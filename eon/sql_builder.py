@@ -1,11 +1,57 @@
 # sql_builder.py
+
+# Valid filter values; keep in sync with the options listed in PROMPT_TEMPLATE (llm_model.py)
+SOURCE_SYSTEMS = [
+    "EON", "PIPELINE", "SWIFT", "SALESFORCE", "SDP_FOA", "SDP_OA",
+    "SDP_ORION", "SERVICENOW_ORDER", "VLOCITY_ORDER",
+]
+ORDER_TYPES = ["ALL"]
+ORDER_STATUSES = [
+    "ALL", "In progress", "entered", "cancelled", "complete",
+    "rejected", "incomplete Entry", "hiberated activation",
+]
+ORDER_ACTIONS = ["ALL", "Install", "disconnect", "change", "legacy"]
+
+FILTER_OPTIONS = {
+    "source_system": (SOURCE_SYSTEMS, "EON"),
+    "order_type": (ORDER_TYPES, "ALL"),
+    "order_status": (ORDER_STATUSES, "ALL"),
+    "order_action": (ORDER_ACTIONS, "ALL"),
+}
+
+
+def validate_filters(filters):
+    """
+    Check filters against the allowed options and return a copy with canonical spelling
+    (matching is case-insensitive). Raises ValueError on anything else.
+    """
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object")
+    clean = {}
+    for key, (options, default) in FILTER_OPTIONS.items():
+        value = filters.get(key, default)
+        if not isinstance(value, str):
+            raise ValueError(f"'{key}' must be a string")
+        canonical = {o.lower(): o for o in options}.get(value.strip().lower())
+        if canonical is None:
+            raise ValueError(f"Invalid '{key}': {value!r}; expected one of {options}")
+        clean[key] = canonical
+    for key in ("start_date", "end_date"):
+        value = filters.get(key)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"'{key}' must be a string")
+        clean[key] = value
+    return clean
+
+
 def build_sql_query(filters):
     """
     Build a SQL query using the provided filters.
     The base query is fixed; the date range (and, optionally, order_status and order_action)
-    are appended as WHERE conditions.
+    are appended as WHERE conditions with bound parameters.
+    Returns (sql, params) for cursor.execute(sql, params).
     """
-    sql_query = f"""
+    sql_query = """
 select DISTINCT 
     si.order_no,
     si.item_no,
@@ -44,12 +90,15 @@ where
     and itc.item_type = psp.item_type
 """
     # Append the date range condition using the converted dates
-    sql_query += f"\nand ii.create_date between '{filters['start_date']}' and '{filters['end_date']}'"
+    sql_query += "\nand ii.create_date between ? and ?"
+    params = [filters["start_date"], filters["end_date"]]
 
     # Append additional filters if they are not "ALL"
     if filters.get("order_status", "ALL").upper() != "ALL":
-        sql_query += f"\nand oo.order_status = '{filters['order_status']}'"
+        sql_query += "\nand oo.order_status = ?"
+        params.append(filters["order_status"])
     if filters.get("order_action", "ALL").upper() != "ALL":
-        sql_query += f"\nand ii.action = '{filters['order_action']}'"
+        sql_query += "\nand ii.action = ?"
+        params.append(filters["order_action"])
 
-    return sql_query
+    return sql_query, params